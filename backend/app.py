@@ -1,8 +1,13 @@
 from flask import Flask, request, jsonify, send_file
 from werkzeug.utils import secure_filename
 import os
+import mimetypes
+import shutil
+import threading
+import uuid
 from pdf_checker import check_pdf_accessibility, update_report_with_contrast
 from color_contrast_checker import analyze_pdf_contrast
+from report_store import store_report, resolve_download, strong_etag, select_variant, start_sweeper
 from flask_cors import CORS
 import traceback
 
@@ -12,9 +17,33 @@ CORS(app)
 UPLOAD_FOLDER = 'uploads'
 REPORT_FOLDER = 'reports'
 
+# Retention limits for the background sweeper
+REPORT_MAX_AGE = 7 * 24 * 3600
+REPORT_MAX_BYTES = 512 * 1024 * 1024
+UPLOAD_MAX_AGE = 24 * 3600
+SWEEP_INTERVAL = 600
+
+# Content-addressed reports never change, so clients may cache them for a year
+REPORT_CACHE_MAX_AGE = 365 * 24 * 3600
+
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(REPORT_FOLDER, exist_ok=True)
 
+# Process that owns the running sweeper; a forked worker starts its own
+_sweeper_pid = None
+_sweeper_lock = threading.Lock()
+
+@app.before_request
+def ensure_sweeper():
+    """Start the retention sweeper once per serving process, whatever server runs the app."""
+    global _sweeper_pid
+    if _sweeper_pid == os.getpid():
+        return
+    with _sweeper_lock:
+        if _sweeper_pid != os.getpid():
+            start_sweeper(REPORT_FOLDER, UPLOAD_FOLDER, REPORT_MAX_AGE, REPORT_MAX_BYTES, UPLOAD_MAX_AGE, SWEEP_INTERVAL)
+            _sweeper_pid = os.getpid()
+
 @app.route('/upload', methods=['POST'])
 def upload_pdf():
     try:
@@ -28,43 +57,97 @@ def upload_pdf():
         if not file.filename.lower().endswith('.pdf'):
             return jsonify({"error": "Only PDF files are allowed"}), 400
 
+        # Each request works in its own directory so concurrent uploads of the
+        # same file name never share the PDF or intermediate reports
         filename = secure_filename(file.filename)
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(filepath)
+        work_dir = os.path.join(UPLOAD_FOLDER, uuid.uuid4().hex)
+        os.makedirs(work_dir)
+        filepath = os.path.join(work_dir, filename)
 
         try:
+            file.save(filepath)
+
             # Step 1: Run main accessibility checks
             text_report_path, issues, page_issues, general_issues = check_pdf_accessibility(
-                filepath, REPORT_FOLDER, return_issues=True
+                filepath, work_dir, return_issues=True
             )
 
             # Step 2: Run color contrast checks
             contrast_report_path, contrast_issues = analyze_pdf_contrast(
-                filepath, REPORT_FOLDER, return_issues=True
+                filepath, work_dir, return_issues=True
             )
 
             # Step 3: Update the structured report with contrast issues
             update_report_with_contrast(text_report_path, contrast_issues)
 
+            # Step 4: Publish the finished reports under content-addressed names
+            report_name = store_report(text_report_path, REPORT_FOLDER)
+            # The contrast index and its detail files are stored as one set
+            contrast_set_name = store_report(os.path.dirname(contrast_report_path), REPORT_FOLDER)
+            contrast_report_name = f"{contrast_set_name}/{os.path.basename(contrast_report_path)}"
+
         except Exception as e:
             traceback.print_exc()
             return jsonify({"error": f"PDF analysis failed: {str(e)}"}), 500
 
+        finally:
+            # The source PDF is not needed once the reports exist
+            shutil.rmtree(work_dir, ignore_errors=True)
+
         return jsonify({
-            "report": os.path.basename(text_report_path),
-            "contrast_report": os.path.basename(contrast_report_path)
+            "report": report_name,
+            "contrast_report": contrast_report_name
         })
 
     except Exception as e:
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
-@app.route('/download/<filename>', methods=['GET'])
+@app.route('/download/<path:filename>', methods=['GET'])
 def download_report(filename):
-    full_path = os.path.join(REPORT_FOLDER, filename)
-    if not os.path.exists(full_path):
+    # Variants are only served through content negotiation on their report
+    resolved = resolve_download(REPORT_FOLDER, filename)
+    if resolved is None:
         return jsonify({"error": "Report not found"}), 404
-    return send_file(full_path, as_attachment=True)
+
+    full_path, download_name, digest = resolved
+    etag = digest or strong_etag(full_path)
+
+    # Byte ranges are served from the uncompressed file so offsets stay meaningful
+    serve_path, encoding = full_path, None
+    if 'Range' not in request.headers:
+        serve_path, encoding = select_variant(full_path, request.accept_encodings)
+    if encoding:
+        etag = f"{etag}-{encoding}"
+
+    # Content-addressed HTML reports open in the browser so the contrast index
+    # can link to its detail files; legacy HTML is only ever downloaded
+    mimetype = mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
+    inline = digest is not None and mimetype == 'text/html'
+    response = send_file(
+        serve_path,
+        mimetype=mimetype,
+        as_attachment=not inline,
+        download_name=download_name,
+        etag=etag,
+        conditional=True,
+        max_age=REPORT_CACHE_MAX_AGE if digest else None,
+    )
+    if encoding:
+        # Ranges are only served from the uncompressed file, so a compressed
+        # body must not be resumed with one
+        response.headers['Content-Encoding'] = encoding
+        response.headers['Accept-Ranges'] = 'none'
+    if inline:
+        response.headers['Content-Security-Policy'] = "default-src 'none'; style-src 'unsafe-inline'"
+    response.vary.add('Accept-Encoding')
+    if digest:
+        response.cache_control.public = False
+        response.cache_control.private = True
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
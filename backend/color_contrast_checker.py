@@ -1,6 +1,7 @@
 import fitz  # PyMuPDF
 import os
 import math
+import html
 
 def calculate_contrast_ratio(color1, color2):
     """Calculate contrast ratio between two RGB colors (0-1 range)."""
@@ -30,91 +31,210 @@ def rgb_from_int(color_int):
     b = (color_int & 0xFF) / 255.0
     return (r, g, b)
 
+# Detailed findings written per HTML file before starting the next one
+DETAIL_ENTRIES_PER_FILE = 500
+
+# Examples kept per aggregated group in the index
+MAX_EXAMPLES_PER_GROUP = 3
+
+REPORT_STYLE = ("<style>body { font-family: Arial, sans-serif; margin: 20px; }\n"
+                ".issue { background-color: #fff3f3; padding: 10px; margin: 5px; border-left: 4px solid #ff6b6b; }\n"
+                ".good { background-color: #f3fff3; padding: 10px; margin: 5px; border-left: 4px solid #6bff6b; }\n"
+                "table { border-collapse: collapse; } td, th { border: 1px solid #ccc; padding: 4px 8px; text-align: left; }\n"
+                "</style>")
+
+def _add_page(ranges, page):
+    """Extend a list of [first, last] page runs with a page seen in document order."""
+    if ranges and ranges[-1][1] >= page - 1:
+        ranges[-1][1] = max(ranges[-1][1], page)
+    else:
+        ranges.append([page, page])
+
+def _format_ranges(ranges):
+    return ", ".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+def format_page_ranges(pages):
+    """Collapse a sorted list of page numbers into '1-3, 7, 9-10'."""
+    ranges = []
+    for page in pages:
+        _add_page(ranges, page)
+    return _format_ranges(ranges)
+
+def _preview_span(hex_color, font_size, text):
+    """HTML preview of a span in its own colour on a white background."""
+    preview = html.escape(text[:50] + ("..." if len(text) > 50 else ""))
+    return (f'<span style="color: {hex_color}; font-size: {font_size}pt; background-color: white; '
+            f'padding: 2px 5px; border: 1px solid #ccc;">{preview}</span>')
+
+def _start_detail_file(path, title, number):
+    f = open(path, "w", encoding="utf-8")
+    f.write(f"<html><head><title>Color Contrast Details {number}</title>\n{REPORT_STYLE}</head><body>\n")
+    f.write(f"<h2>Color Contrast Details for {html.escape(title)} (part {number})</h2>\n")
+    return f
+
+def _finish_detail_file(f):
+    f.write("</body></html>\n")
+    f.close()
+
 def analyze_pdf_contrast(pdf_path, report_folder, return_issues=False):
-    """Check color contrast in a PDF using proper contrast ratio calculation."""
+    """
+    Check color contrast in a PDF using proper contrast ratio calculation.
+
+    Failures are grouped by (colour, size class, ratio) in the index report,
+    which links to detail files of DETAIL_ENTRIES_PER_FILE findings each.
+    Detail files are streamed to disk as the document is scanned. The index
+    and its detail files are written to their own directory in report_folder
+    so they can be stored and served as one set.
+
+    The returned issues are one summary per group, prefixed with the pages it
+    covers ("Pages 1-3, 7: ..."), so their number does not grow with the page
+    count. Pages are kept as runs, so a group spanning a whole document costs
+    a single range.
+    """
     doc = fitz.open(pdf_path)
     issues = []
+    pdf_name = os.path.basename(pdf_path)
 
-    # HTML report filename
-    contrast_report_filename = os.path.basename(pdf_path).replace(".pdf", "_contrast.html")
-    contrast_report_path = os.path.join(report_folder, contrast_report_filename)
+    # HTML report filename, inside a directory holding the whole report set
+    contrast_name = f"{os.path.splitext(pdf_name)[0]}_contrast"
+    contrast_report_dir = os.path.join(report_folder, contrast_name)
+    os.makedirs(contrast_report_dir, exist_ok=True)
+    for name in os.listdir(contrast_report_dir):
+        # Drop pages left by an earlier run so they do not join this set
+        if name.startswith(contrast_name) and name.endswith(".html"):
+            os.remove(os.path.join(contrast_report_dir, name))
+    contrast_report_path = os.path.join(contrast_report_dir, f"{contrast_name}.html")
+    detail_stem = os.path.join(contrast_report_dir, contrast_name)
 
-    html_content = ["<html><head><title>Color Contrast Report</title>"]
-    html_content.append("<style>body { font-family: Arial, sans-serif; margin: 20px; }")
-    html_content.append(".issue { background-color: #fff3f3; padding: 10px; margin: 5px; border-left: 4px solid #ff6b6b; }")
-    html_content.append(".good { background-color: #f3fff3; padding: 10px; margin: 5px; border-left: 4px solid #6bff6b; }")
-    html_content.append("</style></head><body>")
-    html_content.append(f"<h2>Color Contrast Report for {os.path.basename(pdf_path)}</h2>")
-
-    for page_num in range(len(doc)):
-        page = doc[page_num]
+    groups = {}
+    detail_links = []
+    detail_file = None
+    detail_entries = 0
+    total_failures = 0
+
+    try:
+        for page_num in range(len(doc)):
+            page = doc[page_num]
         
-        # Assume white background for contrast calculation
-        background_color = (1, 1, 1)  # white background
+            # Assume white background for contrast calculation
+            background_color = (1, 1, 1)  # white background
         
-        text_instances = page.get_text("dict")["blocks"]
-
-        for block in text_instances:
-            if "lines" in block:
-                for line in block["lines"]:
-                    for span in line["spans"]:
-                        text = span["text"].strip()
-                        if not text:
-                            continue
+            text_instances = page.get_text("dict")["blocks"]
+
+            for block in text_instances:
+                if "lines" in block:
+                    for line in block["lines"]:
+                        for span in line["spans"]:
+                            text = span["text"].strip()
+                            if not text:
+                                continue
                         
-                        # Get text color
-                        color_int = span.get("color", 0)
-                        text_color = rgb_from_int(color_int)
+                            # Get text color
+                            color_int = span.get("color", 0)
+                            text_color = rgb_from_int(color_int)
                         
-                        # Calculate contrast ratio
-                        contrast_ratio = calculate_contrast_ratio(text_color, background_color)
+                            # Calculate contrast ratio
+                            contrast_ratio = calculate_contrast_ratio(text_color, background_color)
                         
-                        font_size = span.get("size", 0)
+                            font_size = span.get("size", 0)
                         
-                        # WCAG guidelines
-                        if font_size >= 18 or (font_size >= 14 and span.get("flags", 0) & 2):  # bold or large text
-                            min_ratio = 3.0
-                            text_type = "large"
-                        else:
-                            min_ratio = 4.5
-                            text_type = "normal"
+                            # WCAG guidelines
+                            if font_size >= 18 or (font_size >= 14 and span.get("flags", 0) & 2):  # bold or large text
+                                min_ratio = 3.0
+                                text_type = "large"
+                            else:
+                                min_ratio = 4.5
+                                text_type = "normal"
                         
-                        if contrast_ratio < min_ratio:
-                            # Convert RGB to hex for display
-                            r_hex = int(text_color[0] * 255)
-                            g_hex = int(text_color[1] * 255)
-                            b_hex = int(text_color[2] * 255)
-                            hex_color = f"#{r_hex:02x}{g_hex:02x}{b_hex:02x}"
-                            
-                            issue = (f"Page {page_num+1}: Text '{text[:30]}{'...' if len(text) > 30 else ''}' "
-                                    f"has low contrast ratio {contrast_ratio:.2f}:1 "
-                                    f"(needs {min_ratio}:1 for {text_type} text, color: {hex_color}, size: {font_size:.1f}pt)")
-                            issues.append(issue)
-                            
-                            # Add to HTML with color preview
-                            html_content.append(f'<div class="issue">')
-                            html_content.append(f'<strong>Page {page_num+1}:</strong> Low contrast text')
-                            html_content.append(f'<div style="margin: 5px 0; padding: 5px; background-color: white;">')
-                            html_content.append(f'<span style="color: {hex_color}; font-size: {font_size}pt; background-color: white; padding: 2px 5px; border: 1px solid #ccc;">')
-                            html_content.append(f'Preview: {text[:50]}{"..." if len(text) > 50 else ""}')
-                            html_content.append(f'</span>')
-                            html_content.append(f'</div>')
-                            html_content.append(f'Contrast ratio: {contrast_ratio:.2f}:1 (needs {min_ratio}:1 for {text_type} text)')
-                            html_content.append(f'</div>')
+                            if contrast_ratio < min_ratio:
+                                # Convert RGB to hex for display
+                                r_hex = int(text_color[0] * 255)
+                                g_hex = int(text_color[1] * 255)
+                                b_hex = int(text_color[2] * 255)
+                                hex_color = f"#{r_hex:02x}{g_hex:02x}{b_hex:02x}"
+
+                                key = (hex_color, text_type, f"{contrast_ratio:.2f}")
+                                group = groups.get(key)
+                                if group is None:
+                                    group = groups[key] = {"min_ratio": min_ratio, "count": 0, "pages": [], "examples": []}
+                                group["count"] += 1
+                                _add_page(group["pages"], page_num + 1)
+                                if len(group["examples"]) < MAX_EXAMPLES_PER_GROUP:
+                                    group["examples"].append((page_num + 1, font_size, text))
+                                total_failures += 1
+
+                                # Stream the finding to the current detail file
+                                if detail_file is None:
+                                    detail_path = f"{detail_stem}_{len(detail_links) + 1:03d}.html"
+                                    detail_file = _start_detail_file(detail_path, pdf_name, len(detail_links) + 1)
+                                detail_file.write(
+                                    f'<div class="issue"><strong>Page {page_num+1}:</strong> Low contrast text'
+                                    f'<div style="margin: 5px 0; padding: 5px; background-color: white;">'
+                                    f'{_preview_span(hex_color, font_size, text)}</div>'
+                                    f'Contrast ratio: {contrast_ratio:.2f}:1 (needs {min_ratio}:1 for {text_type} text)</div>\n'
+                                )
+                                detail_entries += 1
+                                if detail_entries == DETAIL_ENTRIES_PER_FILE:
+                                    _finish_detail_file(detail_file)
+                                    detail_links.append(os.path.basename(detail_path))
+                                    detail_file = None
+                                    detail_entries = 0
+
+        if detail_file is not None:
+            _finish_detail_file(detail_file)
+            detail_file = None
+            detail_links.append(os.path.basename(detail_path))
+    finally:
+        if detail_file is not None:
+            # The scan failed part way, drop the unfinished detail file
+            detail_file.close()
+            os.remove(detail_path)
+        doc.close()
+
+    html_content = ["<html><head><title>Color Contrast Report</title>"]
+    html_content.append(REPORT_STYLE)
+    html_content.append("</head><body>")
+    html_content.append(f"<h2>Color Contrast Report for {html.escape(pdf_name)}</h2>")
+
+    # Most frequent findings first
+    ranked_groups = sorted(groups.items(), key=lambda item: -item[1]["count"])
+    for (hex_color, text_type, ratio), group in ranked_groups:
+        text = group["examples"][0][2]
+        issues.append(f"Pages {_format_ranges(group['pages'])}: {group['count']} text span(s) such as "
+                      f"'{text[:30]}{'...' if len(text) > 30 else ''}' have low contrast ratio {ratio}:1 "
+                      f"(needs {group['min_ratio']}:1 for {text_type} text, color: {hex_color})")
 
     if not issues:
         no_issue_msg = "✅ No color contrast issues found."
         issues.append(no_issue_msg)
         html_content.append(f'<div class="good">{no_issue_msg}</div>')
+    else:
+        html_content.append(f"<p>{total_failures} low contrast text span(s) in {len(groups)} group(s).</p>")
+        html_content.append("<table><tr><th>Color</th><th>Text size</th><th>Contrast ratio</th>"
+                            "<th>Spans</th><th>Pages</th><th>Examples</th></tr>")
+        for (hex_color, text_type, ratio), group in ranked_groups:
+            examples = "<br>".join(f"Page {p}: {_preview_span(hex_color, size, text)}"
+                                   for p, size, text in group["examples"])
+            html_content.append(
+                f"<tr><td>{hex_color}</td><td>{text_type}</td>"
+                f"<td>{ratio}:1 (needs {group['min_ratio']}:1)</td><td>{group['count']}</td>"
+                f"<td>{_format_ranges(group['pages'])}</td><td>{examples}</td></tr>"
+            )
+        html_content.append("</table>")
+
+        html_content.append("<h3>Detailed findings</h3><ul>")
+        for number, link in enumerate(detail_links, start=1):
+            first = (number - 1) * DETAIL_ENTRIES_PER_FILE + 1
+            last = min(number * DETAIL_ENTRIES_PER_FILE, total_failures)
+            html_content.append(f'<li><a href="{html.escape(link)}">Part {number}</a> (findings {first}-{last})</li>')
+        html_content.append("</ul>")
 
     html_content.append("</body></html>")
 
     with open(contrast_report_path, "w", encoding="utf-8") as f:
         f.write("\n".join(html_content))
 
-    doc.close()
-
     if return_issues:
         return contrast_report_path, issues
     else:
-        return contrast_report_path
\ No newline at end of file
+        return contrast_report_path
@@ -2,6 +2,7 @@ import jpype
 import jpype.imports
 from jpype.types import *
 import os
+import re
 import requests
 from datetime import datetime
 import cv2
@@ -443,64 +444,89 @@ def check_pdf_accessibility(pdf_path, report_folder=None, return_issues=False):
 
     return report_path, all_issues, page_issues, general_issues
 
+def _parse_page_ranges(text):
+    """Expand '1-3, 7' into its page numbers."""
+    pages = []
+    for part in text.split(","):
+        first, _, last = part.strip().partition("-")
+        pages.extend(range(int(first), int(last or first) + 1))
+    return pages
+
+def _replace_contrast_section(page_content, new_contrast_section):
+    """Swap the contrast section of one page section for new_contrast_section."""
+    old_contrast_pattern = "#### 5. Color Contrast and Font Legibility\n- **Issues Detected**: No contrast issues detected.\n- **Recommendation**: N/A\n\n"
+    if old_contrast_pattern in page_content:
+        return page_content.replace(old_contrast_pattern, new_contrast_section)
+
+    # If pattern not found, try to insert after section 4
+    alt_pattern = "#### 4. Image Quality and Clarity\n"
+    alt_pos = page_content.find(alt_pattern)
+    if alt_pos != -1:
+        section_end = page_content.find("####", alt_pos + len(alt_pattern))
+        if section_end != -1:
+            page_content = page_content[:section_end] + new_contrast_section + page_content[section_end:]
+    return page_content
+
 def update_report_with_contrast(text_report_path, contrast_issues):
-    """Update the structured report with color contrast issues"""
-    
+    """
+    Update the structured report with color contrast issues.
+
+    Issues are either for one page ("Page 3: ...") or summaries of a group of
+    findings ("Pages 1-3, 7: ..."). Summaries are listed once in a Color
+    Contrast Summary section and referenced from each page they cover.
+    """
+
     # Parse contrast issues by page
     contrast_by_page = {}
+    summaries = []
     for issue in contrast_issues:
-        if "Page " in issue and ":" in issue:
+        if issue.startswith("Pages ") and ":" in issue:
+            try:
+                pages = _parse_page_ranges(issue[len("Pages "):].split(":")[0])
+            except ValueError:
+                continue
+            summaries.append(issue)
+            for page_num in pages:
+                contrast_by_page.setdefault(page_num, []).append(f"Low contrast text, see Color Contrast Summary item {len(summaries)}")
+        elif "Page " in issue and ":" in issue:
             # Extract page number from issue string
             page_part = issue.split("Page ")[1].split(":")[0]
             try:
                 page_num = int(page_part)
-                if page_num not in contrast_by_page:
-                    contrast_by_page[page_num] = []
-                contrast_by_page[page_num].append(issue)
+                contrast_by_page.setdefault(page_num, []).append(issue)
             except ValueError:
                 continue
-    
+
     # If no contrast issues found, return early
     if not contrast_by_page:
         return
-    
+
     # Read the existing report
     with open(text_report_path, "r", encoding="utf-8") as f:
         report_content = f.read()
-    
-    # Update contrast sections for each page
-    for page_num in contrast_by_page:
-        # Create new contrast section
+
+    # Update contrast sections in a single pass over the page sections
+    sections = re.split(r"(?=### Page \d+\n\n)", report_content)
+    for index, page_content in enumerate(sections):
+        match = re.match(r"### Page (\d+)\n\n", page_content)
+        if not match or int(match.group(1)) not in contrast_by_page:
+            continue
         new_contrast_section = f"#### 5. Color Contrast and Font Legibility\n"
-        new_contrast_section += "- **Issues Detected**: " + "; ".join(contrast_by_page[page_num]) + "\n"
+        new_contrast_section += "- **Issues Detected**: " + "; ".join(contrast_by_page[int(match.group(1))]) + "\n"
         new_contrast_section += "- **Recommendation**: Ensure text contrast meets WCAG standards (4.5:1 for normal text, 3:1 for large text).\n\n"
-        
-        # Find the page section
-        page_header = f"### Page {page_num}\n\n"
-        page_start = report_content.find(page_header)
-        if page_start != -1:
-            page_end = report_content.find("### Page", page_start + len(page_header))
-            if page_end == -1:
-                page_end = len(report_content)
-            
-            page_content = report_content[page_start:page_end]
-            
-            # Replace the existing contrast section
-            old_contrast_pattern = "#### 5. Color Contrast and Font Legibility\n- **Issues Detected**: No contrast issues detected.\n- **Recommendation**: N/A\n\n"
-            if old_contrast_pattern in page_content:
-                page_content = page_content.replace(old_contrast_pattern, new_contrast_section)
-            else:
-                # If pattern not found, try to insert after section 4
-                alt_pattern = "#### 4. Image Quality and Clarity\n"
-                alt_pos = page_content.find(alt_pattern)
-                if alt_pos != -1:
-                    section_end = page_content.find("####", alt_pos + len(alt_pattern))
-                    if section_end != -1:
-                        page_content = page_content[:section_end] + new_contrast_section + page_content[section_end:]
-            
-            # Update the report content
-            report_content = report_content[:page_start] + page_content + report_content[page_end:]
-    
+        sections[index] = _replace_contrast_section(page_content, new_contrast_section)
+    report_content = "".join(sections)
+
+    if summaries:
+        summary_section = "## Color Contrast Summary\n\n"
+        summary_section += "".join(f"{number}. {summary}\n" for number, summary in enumerate(summaries, start=1))
+        summary_section += "\n"
+        recommendations = report_content.find("## General Recommendations\n")
+        if recommendations == -1:
+            report_content += summary_section
+        else:
+            report_content = report_content[:recommendations] + summary_section + report_content[recommendations:]
+
     # Write the updated report
     with open(text_report_path, "w", encoding="utf-8") as f:
-        f.write(report_content)
\ No newline at end of file
+        f.write(report_content)
@@ -0,0 +1,264 @@
+import gzip
+import hashlib
+import os
+import re
+import shutil
+import threading
+import time
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip variants are always written
+    brotli = None
+
+# Precompressed variants, in order of preference when serving
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+# Files smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+DIGEST_LENGTH = 16
+CHUNK_SIZE = 64 * 1024
+
+_STORED_NAME = re.compile(r"^(?P<stem>.+)\.(?P<digest>[0-9a-f]{%d})(?P<ext>\.[^.]+)$" % DIGEST_LENGTH)
+_STORED_SET = re.compile(r"^(?P<stem>.+)\.(?P<digest>[0-9a-f]{%d})$" % DIGEST_LENGTH)
+_SAFE_PART = re.compile(r"^[A-Za-z0-9_-][A-Za-z0-9_.-]*$")
+
+
+def file_digest(path):
+    """Return the sha256 hex digest of a file, read in chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _set_digest(path):
+    """Digest over the names and contents of every file in a report set."""
+    h = hashlib.sha256()
+    for name in sorted(os.listdir(path)):
+        h.update(name.encode("utf-8") + b"\0" + file_digest(os.path.join(path, name)).encode("ascii"))
+    return h.hexdigest()
+
+
+def _write_variant(src_path, dest_path, encoding):
+    """Write a compressed copy of src_path atomically."""
+    tmp_path = dest_path + ".tmp"
+    with open(src_path, "rb") as src, open(tmp_path, "wb") as raw:
+        if encoding == "gzip":
+            with gzip.GzipFile(filename="", mode="wb", fileobj=raw, compresslevel=9, mtime=0) as gz:
+                shutil.copyfileobj(src, gz, CHUNK_SIZE)
+        else:
+            compressor = brotli.Compressor(quality=11)
+            for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                raw.write(compressor.process(chunk))
+            raw.write(compressor.finish())
+    os.replace(tmp_path, dest_path)
+
+
+def _write_variants(src_path, dest_path):
+    """Compress src_path next to itself and move the variants to dest_path + suffix."""
+    if os.path.getsize(src_path) < MIN_COMPRESS_SIZE:
+        return
+    for encoding, suffix in ENCODINGS:
+        if encoding == "br" and brotli is None:
+            continue
+        _write_variant(src_path, src_path + suffix, encoding)
+        if dest_path != src_path:
+            os.replace(src_path + suffix, dest_path + suffix)
+
+
+def _refresh(stored_path):
+    """Touch an already stored report and its variants, False if it is gone."""
+    try:
+        os.utime(stored_path)
+    except FileNotFoundError:
+        return False
+    for _, suffix in ENCODINGS:
+        try:
+            os.utime(stored_path + suffix)
+        except FileNotFoundError:
+            pass
+    return True
+
+
+def store_report(path, report_folder):
+    """
+    Move a report written in a per-request working directory to its
+    content-addressed name in report_folder, together with its compressed
+    variants. Both folders must be on the same filesystem. A directory is
+    stored as one report set, e.g. a contrast index with its detail files, so
+    its members are served and evicted together. Returns the stored name.
+    """
+    name = os.path.basename(path)
+    is_set = os.path.isdir(path)
+    if is_set:
+        stored_name = f"{name}.{_set_digest(path)[:DIGEST_LENGTH]}"
+    else:
+        stem, ext = os.path.splitext(name)
+        stored_name = f"{stem}.{file_digest(path)[:DIGEST_LENGTH]}{ext}"
+    stored_path = os.path.join(report_folder, stored_name)
+
+    # Identical content was already stored, just refresh its age
+    if _refresh(stored_path):
+        if is_set:
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+        return stored_name
+
+    # Variants are compressed in the working directory and moved in before the
+    # report itself, so report_folder never holds partially written files
+    if is_set:
+        for member in sorted(os.listdir(path)):
+            _write_variants(os.path.join(path, member), os.path.join(path, member))
+        try:
+            os.replace(path, stored_path)
+        except OSError:
+            # A concurrent request stored the same set first
+            if not os.path.isdir(stored_path):
+                raise
+            shutil.rmtree(path)
+    else:
+        _write_variants(path, stored_path)
+        os.replace(path, stored_path)
+
+    return stored_name
+
+
+def parse_stored_name(filename):
+    """Split a stored name into (download name, digest), digest is None for legacy names."""
+    match = _STORED_NAME.match(filename)
+    if not match:
+        return filename, None
+    return match.group("stem") + match.group("ext"), match.group("digest")
+
+
+def strong_etag(path):
+    """ETag for a stored report; legacy names fall back to hashing the file."""
+    _, digest = parse_stored_name(os.path.basename(path))
+    if digest is None:
+        digest = file_digest(path)[:DIGEST_LENGTH]
+    return digest
+
+
+def select_variant(path, accept_encodings):
+    """
+    Pick the best precompressed variant the client accepts.
+    Returns (path to serve, content encoding or None).
+    """
+    for encoding, suffix in ENCODINGS:
+        if accept_encodings.quality(encoding) > 0 and os.path.exists(path + suffix):
+            return path + suffix, encoding
+    return path, None
+
+
+def resolve_download(report_folder, filename):
+    """
+    Map a download name, either "report" or "set/member", to
+    (path, download name, digest). Digest is None for legacy names. Returns
+    None for anything that must not be served directly, such as variants,
+    temp files or paths outside report_folder.
+    """
+    parts = filename.split("/")
+    if len(parts) > 2 or not all(_SAFE_PART.match(part) for part in parts):
+        return None
+    name = parts[-1]
+    if is_variant(name) or name.endswith(".tmp"):
+        return None
+    if len(parts) == 2:
+        match = _STORED_SET.match(parts[0])
+        if not match:
+            return None
+        download_name, digest = name, match.group("digest")
+    else:
+        download_name, digest = parse_stored_name(name)
+    path = os.path.join(report_folder, *parts)
+    if not os.path.isfile(path):
+        return None
+    return path, download_name, digest
+
+
+def is_variant(filename):
+    """True for precompressed copies, which are only served through their report."""
+    return filename.endswith(tuple(suffix for _, suffix in ENCODINGS))
+
+
+def sweep_reports(report_folder, max_age, max_bytes, min_age=0, now=None):
+    """
+    Delete reports older than max_age seconds, then the oldest remaining ones
+    until the folder holds at most max_bytes. Variants go with their report
+    and report sets are evicted whole. Reports younger than min_age seconds
+    are never removed, so a sweep cannot race a report that is still being
+    stored or handed to the client.
+    Returns the number of reports removed.
+    """
+    now = now or time.time()
+    groups = {}
+    for entry in os.scandir(report_folder):
+        name = entry.name
+        primary = os.path.splitext(name)[0] if is_variant(name) else name
+        try:
+            stat = entry.stat()
+            size = stat.st_size
+            if entry.is_dir():
+                size = sum(member.stat().st_size for member in os.scandir(entry.path))
+        except FileNotFoundError:
+            continue
+        group = groups.setdefault(primary, {"paths": [], "size": 0, "mtime": 0})
+        group["paths"].append(entry.path)
+        group["size"] += size
+        group["mtime"] = max(group["mtime"], stat.st_mtime)
+
+    removed = 0
+    total = sum(g["size"] for g in groups.values())
+    for primary, group in sorted(groups.items(), key=lambda item: item[1]["mtime"]):
+        age = now - group["mtime"]
+        if age < min_age or (age <= max_age and total <= max_bytes):
+            break
+        for p in group["paths"]:
+            try:
+                if os.path.isdir(p):
+                    shutil.rmtree(p)
+                else:
+                    os.remove(p)
+            except FileNotFoundError:
+                pass
+        total -= group["size"]
+        removed += 1
+    return removed
+
+
+def sweep_uploads(upload_folder, max_age, now=None):
+    """Delete upload working directories left behind by failed or interrupted analyses."""
+    now = now or time.time()
+    removed = 0
+    for entry in os.scandir(upload_folder):
+        try:
+            if now - entry.stat().st_mtime <= max_age:
+                continue
+            if entry.is_dir():
+                shutil.rmtree(entry.path, ignore_errors=True)
+            else:
+                os.remove(entry.path)
+            removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
+
+
+def start_sweeper(report_folder, upload_folder, max_age, max_bytes, upload_max_age, interval):
+    """Run the retention sweep every interval seconds on a daemon thread."""
+    def run():
+        while True:
+            try:
+                sweep_reports(report_folder, max_age, max_bytes, min_age=interval)
+                sweep_uploads(upload_folder, upload_max_age)
+            except Exception as e:
+                print(f"Report retention sweep failed: {e}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name="report-sweeper", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+import color_contrast_checker
+from color_contrast_checker import analyze_pdf_contrast, format_page_ranges
+
+
+def make_pdf(path, pages, lines_per_page, color=(0.8, 0.8, 0.8)):
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page()
+        for i in range(lines_per_page):
+            page.insert_text((72, 72 + i * 14), f"grey <b>{i}</b>", fontsize=10, color=color)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def test_format_page_ranges():
+    assert format_page_ranges([1, 2, 3, 7, 9, 10]) == "1-3, 7, 9-10"
+    assert format_page_ranges([]) == ""
+
+
+def test_failures_are_grouped_and_paged(tmp_path, monkeypatch):
+    monkeypatch.setattr(color_contrast_checker, "DETAIL_ENTRIES_PER_FILE", 20)
+    pdf = make_pdf(tmp_path / "doc.pdf", pages=3, lines_per_page=15)
+
+    report_path, issues = analyze_pdf_contrast(pdf, str(tmp_path), return_issues=True)
+
+    report_dir = tmp_path / "doc_contrast"
+    assert report_path == str(report_dir / "doc_contrast.html")
+    assert sorted(os.listdir(report_dir)) == ["doc_contrast.html", "doc_contrast_001.html",
+                                              "doc_contrast_002.html", "doc_contrast_003.html"]
+    assert len(issues) == 1
+    assert issues[0].startswith("Pages 1-3: 45 text span(s)")
+    with open(report_path, encoding="utf-8") as f:
+        index = f.read()
+    assert "<td>45</td><td>1-3</td>" in index
+    assert index.count("grey &lt;b&gt;") == color_contrast_checker.MAX_EXAMPLES_PER_GROUP
+    assert '<a href="doc_contrast_003.html">Part 3</a> (findings 41-45)' in index
+
+
+def test_no_issues(tmp_path):
+    pdf = make_pdf(tmp_path / "doc.pdf", pages=1, lines_per_page=2, color=(0, 0, 0))
+
+    report_path, issues = analyze_pdf_contrast(pdf, str(tmp_path), return_issues=True)
+
+    assert issues == ["✅ No color contrast issues found."]
+    assert os.listdir(tmp_path / "doc_contrast") == ["doc_contrast.html"]
+
+
+def test_unfinished_detail_file_is_removed_on_error(tmp_path, monkeypatch):
+    pdf = make_pdf(tmp_path / "doc.pdf", pages=2, lines_per_page=3)
+    calls = []
+
+    def failing_contrast_ratio(color1, color2):
+        calls.append(1)
+        if len(calls) > 4:
+            raise RuntimeError("scan failed")
+        return 1.5
+
+    monkeypatch.setattr(color_contrast_checker, "calculate_contrast_ratio", failing_contrast_ratio)
+
+    with pytest.raises(RuntimeError):
+        analyze_pdf_contrast(pdf, str(tmp_path))
+    assert os.listdir(tmp_path / "doc_contrast") == []
+
+
+def test_upper_case_extension_and_rerun(tmp_path, monkeypatch):
+    monkeypatch.setattr(color_contrast_checker, "DETAIL_ENTRIES_PER_FILE", 2)
+    pdf = make_pdf(tmp_path / "SCAN.PDF", pages=1, lines_per_page=3)
+    analyze_pdf_contrast(pdf, str(tmp_path))
+    monkeypatch.setattr(color_contrast_checker, "DETAIL_ENTRIES_PER_FILE", 20)
+
+    report_path = analyze_pdf_contrast(pdf, str(tmp_path))
+
+    assert report_path == str(tmp_path / "SCAN_contrast" / "SCAN_contrast.html")
+    assert sorted(os.listdir(tmp_path / "SCAN_contrast")) == ["SCAN_contrast.html", "SCAN_contrast_001.html"]
+    assert os.path.exists(pdf)
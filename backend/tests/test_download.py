@@ -0,0 +1,113 @@
+import gzip
+import os
+
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("flask_cors")
+pytest.importorskip("jpype")
+pytest.importorskip("cv2")
+pytest.importorskip("fitz")
+
+import app as app_module
+from report_store import store_report
+
+CONTENT = "Accessibility report\n" * 500
+
+
+@pytest.fixture
+def stored(tmp_path, monkeypatch):
+    reports = tmp_path / "reports"
+    reports.mkdir()
+    monkeypatch.setattr(app_module, "REPORT_FOLDER", str(reports))
+    with open(tmp_path / "doc_report.txt", "w", encoding="utf-8") as f:
+        f.write(CONTENT)
+    return store_report(str(tmp_path / "doc_report.txt"), str(reports))
+
+
+@pytest.fixture
+def sweeper_calls(monkeypatch):
+    """Record sweeper starts instead of sweeping the real report folders."""
+    calls = []
+    monkeypatch.setattr(app_module, "start_sweeper", lambda *args: calls.append(args))
+    monkeypatch.setattr(app_module, "_sweeper_pid", None)
+    return calls
+
+
+@pytest.fixture
+def client(sweeper_calls):
+    return app_module.app.test_client()
+
+
+def test_download_sets_strong_etag_and_answers_conditional_get(client, stored):
+    response = client.get(f"/download/{stored}")
+    assert response.status_code == 200
+    assert response.get_data(as_text=True) == CONTENT
+    assert response.headers["ETag"] == f'"{stored.split(".")[1]}"'
+    assert "immutable" in response.headers["Cache-Control"]
+    assert "attachment; filename=doc_report.txt" in response.headers["Content-Disposition"]
+
+    revalidated = client.get(f"/download/{stored}", headers={"If-None-Match": response.headers["ETag"]})
+    assert revalidated.status_code == 304
+
+
+def test_download_serves_precompressed_variant(client, stored):
+    response = client.get(f"/download/{stored}", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Accept-Ranges"] == "none"
+    assert response.headers["ETag"].endswith('-gzip"')
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert response.mimetype == "text/plain"
+    assert gzip.decompress(response.data).decode("utf-8") == CONTENT
+
+
+def test_download_serves_ranges_from_uncompressed_file(client, stored):
+    response = client.get(f"/download/{stored}", headers={"Accept-Encoding": "gzip", "Range": "bytes=0-9"})
+    assert response.status_code == 206
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert response.get_data(as_text=True) == CONTENT[:10]
+
+
+@pytest.mark.parametrize("suffix", [".gz", ".tmp"])
+def test_download_rejects_variant_and_temp_names(client, stored, suffix):
+    path = os.path.join(app_module.REPORT_FOLDER, stored + suffix)
+    if not os.path.exists(path):
+        open(path, "wb").close()
+    assert client.get(f"/download/{stored}{suffix}").status_code == 404
+
+
+@pytest.fixture
+def stored_set(tmp_path, stored):
+    work = tmp_path / "work" / "doc_contrast"
+    os.makedirs(work)
+    for name in ["doc_contrast.html", "doc_contrast_001.html"]:
+        with open(work / name, "w", encoding="utf-8") as f:
+            f.write(f"<html><body>{name}</body></html>")
+    return store_report(str(work), app_module.REPORT_FOLDER)
+
+
+def test_download_serves_report_set_html_inline_with_csp(client, stored_set):
+    response = client.get(f"/download/{stored_set}/doc_contrast_001.html")
+    assert response.status_code == 200
+    assert response.mimetype == "text/html"
+    assert response.headers["Content-Disposition"].startswith("inline")
+    assert response.headers["Content-Security-Policy"] == "default-src 'none'; style-src 'unsafe-inline'"
+    assert "doc_contrast_001.html" in response.get_data(as_text=True)
+
+
+def test_download_serves_legacy_html_as_attachment(client, stored):
+    with open(os.path.join(app_module.REPORT_FOLDER, "legacy_contrast.html"), "w", encoding="utf-8") as f:
+        f.write("<html><body><script>alert(1)</script></body></html>")
+
+    response = client.get("/download/legacy_contrast.html")
+    assert response.headers["Content-Disposition"].startswith("attachment")
+    assert "Content-Security-Policy" not in response.headers
+
+
+def test_first_request_starts_sweeper_once_per_process(client, sweeper_calls, stored):
+    client.get(f"/download/{stored}")
+    client.get(f"/download/{stored}")
+
+    assert sweeper_calls == [(app_module.REPORT_FOLDER, app_module.UPLOAD_FOLDER, app_module.REPORT_MAX_AGE,
+                              app_module.REPORT_MAX_BYTES, app_module.UPLOAD_MAX_AGE, app_module.SWEEP_INTERVAL)]
@@ -0,0 +1,46 @@
+import pytest
+
+pytest.importorskip("jpype")
+pytest.importorskip("cv2")
+
+from pdf_checker import update_report_with_contrast
+
+NO_CONTRAST = ("#### 5. Color Contrast and Font Legibility\n- **Issues Detected**: No contrast issues detected.\n"
+               "- **Recommendation**: N/A\n\n")
+
+
+def write_report(path, pages):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# Report\n\n")
+        for page_num in range(1, pages + 1):
+            f.write(f"### Page {page_num}\n\n{NO_CONTRAST}")
+        f.write("## General Recommendations\n\n- **Alt Text**: ...\n")
+    return str(path)
+
+
+def test_group_summaries_are_listed_once_and_referenced_per_page(tmp_path):
+    path = write_report(tmp_path / "doc_report.txt", pages=4)
+
+    update_report_with_contrast(path, ["Pages 1-2, 4: 30 text span(s) such as 'grey' have low contrast ratio 1.61:1"])
+
+    with open(path, encoding="utf-8") as f:
+        report = f.read()
+    pages = report.split("### Page ")
+    assert "see Color Contrast Summary item 1" in pages[1]
+    assert "see Color Contrast Summary item 1" in pages[2]
+    assert "No contrast issues detected." in pages[3]
+    assert "see Color Contrast Summary item 1" in pages[4]
+    assert ("## Color Contrast Summary\n\n1. Pages 1-2, 4: 30 text span(s)" in report
+            and report.index("## Color Contrast Summary") < report.index("## General Recommendations"))
+
+
+def test_single_page_issues_still_update_their_page(tmp_path):
+    path = write_report(tmp_path / "doc_report.txt", pages=2)
+
+    update_report_with_contrast(path, ["Page 2: Text 'grey' has low contrast ratio 1.61:1"])
+
+    with open(path, encoding="utf-8") as f:
+        report = f.read()
+    assert report.count("No contrast issues detected.") == 1
+    assert "- **Issues Detected**: Page 2: Text 'grey'" in report
+    assert "## Color Contrast Summary" not in report
@@ -0,0 +1,171 @@
+import gzip
+import os
+
+import report_store
+from report_store import parse_stored_name, store_report, sweep_reports, sweep_uploads
+
+
+def write(path, content):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return str(path)
+
+
+def set_age(path, now, age):
+    os.utime(path, (now - age, now - age))
+
+
+def test_parse_stored_name():
+    assert parse_stored_name("doc_report.0123456789abcdef.txt") == ("doc_report.txt", "0123456789abcdef")
+    assert parse_stored_name("doc_report.txt") == ("doc_report.txt", None)
+    assert parse_stored_name("doc_report.0123456789abcdef.txt.gz") == ("doc_report.0123456789abcdef.txt.gz", None)
+
+
+def test_store_report_moves_to_content_addressed_name(tmp_path):
+    work, reports = tmp_path / "work", tmp_path / "reports"
+    work.mkdir()
+    reports.mkdir()
+    path = write(work / "doc_report.txt", "x" * 5000)
+
+    name = store_report(path, str(reports))
+
+    download_name, digest = parse_stored_name(name)
+    assert download_name == "doc_report.txt"
+    assert digest == report_store.file_digest(reports / name)[:report_store.DIGEST_LENGTH]
+    assert not os.path.exists(path)
+    with gzip.open(reports / (name + ".gz"), "rt", encoding="utf-8") as f:
+        assert f.read() == "x" * 5000
+    assert not [n for n in os.listdir(reports) if n.endswith(".tmp")]
+
+
+def test_store_report_skips_variants_for_small_files(tmp_path):
+    path = write(tmp_path / "doc_report.txt", "short")
+    reports = tmp_path / "reports"
+    reports.mkdir()
+
+    name = store_report(path, str(reports))
+
+    assert os.listdir(reports) == [name]
+
+
+def test_store_report_dedupes_identical_content(tmp_path):
+    reports = tmp_path / "reports"
+    reports.mkdir()
+    first = store_report(write(tmp_path / "doc_report.txt", "x" * 5000), str(reports))
+    set_age(reports / first, 1_000_000, 0)
+
+    second = store_report(write(tmp_path / "doc_report.txt", "x" * 5000), str(reports))
+
+    assert first == second
+    assert os.path.getmtime(reports / first) > 1_000_000
+    assert not os.path.exists(tmp_path / "doc_report.txt")
+
+
+def test_store_report_restores_report_evicted_before_dedupe(tmp_path):
+    reports = tmp_path / "reports"
+    reports.mkdir()
+    name = store_report(write(tmp_path / "doc_report.txt", "x" * 5000), str(reports))
+    os.remove(reports / name)
+
+    assert store_report(write(tmp_path / "doc_report.txt", "x" * 5000), str(reports)) == name
+    assert os.path.exists(reports / name)
+
+
+def test_sweep_reports_removes_expired_reports_with_variants(tmp_path):
+    now = 1_000_000
+    old = write(tmp_path / "old.0123456789abcdef.txt", "old")
+    old_gz = write(tmp_path / "old.0123456789abcdef.txt.gz", "old")
+    new = write(tmp_path / "new.fedcba9876543210.txt", "new")
+    set_age(old, now, 100)
+    set_age(old_gz, now, 100)
+    set_age(new, now, 10)
+
+    assert sweep_reports(str(tmp_path), max_age=50, max_bytes=10**9, now=now) == 1
+    assert os.listdir(tmp_path) == [os.path.basename(new)]
+
+
+def test_sweep_reports_evicts_oldest_until_under_size_limit(tmp_path):
+    now = 1_000_000
+    for age, name in [(30, "a"), (20, "b"), (10, "c")]:
+        report = write(tmp_path / f"{name}.txt", "x" * 100)
+        variant = write(tmp_path / f"{name}.txt.gz", "x" * 50)
+        set_age(report, now, age)
+        set_age(variant, now, age)
+
+    assert sweep_reports(str(tmp_path), max_age=10**6, max_bytes=300, now=now) == 1
+    assert sorted(os.listdir(tmp_path)) == ["b.txt", "b.txt.gz", "c.txt", "c.txt.gz"]
+
+
+def test_sweep_reports_keeps_reports_younger_than_min_age(tmp_path):
+    now = 1_000_000
+    report = write(tmp_path / "a.txt", "x" * 100)
+    set_age(report, now, 5)
+
+    assert sweep_reports(str(tmp_path), max_age=10**6, max_bytes=0, min_age=60, now=now) == 0
+    assert os.listdir(tmp_path) == ["a.txt"]
+
+
+def test_sweep_uploads_removes_stale_working_directories(tmp_path):
+    now = 1_000_000
+    stale, fresh = tmp_path / "stale", tmp_path / "fresh"
+    stale.mkdir()
+    fresh.mkdir()
+    write(stale / "doc.pdf", "pdf")
+    set_age(stale, now, 100)
+    set_age(fresh, now, 10)
+
+    assert sweep_uploads(str(tmp_path), max_age=50, now=now) == 1
+    assert os.listdir(tmp_path) == ["fresh"]
+
+
+def write_set(folder, names, content="x" * 2000):
+    os.makedirs(folder)
+    for name in names:
+        write(os.path.join(folder, name), content + name)
+    return str(folder)
+
+
+def test_store_report_stores_directory_as_one_set(tmp_path):
+    reports = tmp_path / "reports"
+    reports.mkdir()
+    names = ["doc_contrast.html", "doc_contrast_001.html"]
+
+    name = store_report(write_set(tmp_path / "work" / "doc_contrast", names), str(reports))
+
+    assert name.startswith("doc_contrast.")
+    assert os.listdir(reports) == [name]
+    assert sorted(os.listdir(reports / name)) == sorted(names + [n + ".gz" for n in names]
+                                                        + ([n + ".br" for n in names] if report_store.brotli else []))
+    again = store_report(write_set(tmp_path / "again" / "doc_contrast", names), str(reports))
+    assert again == name
+    assert not os.path.exists(tmp_path / "again" / "doc_contrast")
+
+
+def test_sweep_reports_evicts_report_sets_whole(tmp_path):
+    now = 1_000_000
+    reports = tmp_path / "reports"
+    reports.mkdir()
+    old_set = store_report(write_set(tmp_path / "w1" / "old_contrast", ["old_contrast.html", "old_contrast_001.html"]),
+                           str(reports))
+    new_report = store_report(write(tmp_path / "new_report.txt", "y" * 2000), str(reports))
+    set_age(reports / old_set, now, 100)
+    for name in os.listdir(reports):
+        if name != old_set:
+            set_age(reports / name, now, 10)
+
+    assert sweep_reports(str(reports), max_age=10**6, max_bytes=5000, now=now) == 1
+    assert not os.path.exists(reports / old_set)
+    assert os.path.exists(reports / new_report)
+
+
+def test_resolve_download(tmp_path):
+    reports = tmp_path / "reports"
+    reports.mkdir()
+    set_name = store_report(write_set(tmp_path / "w" / "doc_contrast", ["doc_contrast.html"]), str(reports))
+
+    path, download_name, digest = report_store.resolve_download(str(reports), f"{set_name}/doc_contrast.html")
+    assert path == os.path.join(str(reports), set_name, "doc_contrast.html")
+    assert (download_name, digest) == ("doc_contrast.html", set_name.split(".")[1])
+    for name in [f"{set_name}/doc_contrast.html.gz", f"{set_name}/../{set_name}/doc_contrast.html",
+                 "../reports/x.txt", f"{set_name}/missing.html", set_name]:
+        assert report_store.resolve_download(str(reports), name) is None
@@ -0,0 +1,52 @@
+import io
+import os
+
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("flask_cors")
+pytest.importorskip("jpype")
+pytest.importorskip("cv2")
+fitz = pytest.importorskip("fitz")
+
+import app as app_module
+
+
+def fake_accessibility_check(pdf_path, report_folder, return_issues=False):
+    report_path = os.path.join(report_folder, os.path.splitext(os.path.basename(pdf_path))[0] + "_report.txt")
+    with open(report_path, "w", encoding="utf-8") as f:
+        f.write("### Page 1\n\n")
+    return report_path, [], {}, {}
+
+
+@pytest.mark.parametrize("upload_name", ["document.pdf", "document.PDF"])
+def test_upload_stores_reports_and_removes_working_directory(tmp_path, monkeypatch, upload_name):
+    uploads, reports = tmp_path / "uploads", tmp_path / "reports"
+    uploads.mkdir()
+    reports.mkdir()
+    monkeypatch.setattr(app_module, "UPLOAD_FOLDER", str(uploads))
+    monkeypatch.setattr(app_module, "REPORT_FOLDER", str(reports))
+    monkeypatch.setattr(app_module, "check_pdf_accessibility", fake_accessibility_check)
+    monkeypatch.setattr(app_module, "start_sweeper", lambda *args: None)
+    monkeypatch.setattr(app_module, "_sweeper_pid", None)
+
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "light text", color=(0.8, 0.8, 0.8))
+    pdf_bytes = doc.tobytes()
+    doc.close()
+
+    client = app_module.app.test_client()
+    response = client.post("/upload", data={"pdf": (io.BytesIO(pdf_bytes), upload_name)},
+                           content_type="multipart/form-data")
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["report"].startswith("document_report.")
+    set_name, index_name = body["contrast_report"].split("/")
+    assert index_name == "document_contrast.html"
+    assert os.path.isfile(reports / set_name / index_name)
+    assert os.listdir(uploads) == []
+    index = client.get(f"/download/{body['contrast_report']}")
+    assert index.status_code == 200
+    assert index.mimetype == "text/html"
+    assert index.headers["Content-Disposition"].startswith("inline")